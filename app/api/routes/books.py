@@ -2,22 +2,81 @@
 Extensions CRUD for books
 """
 
+import asyncio
+import itertools
+import time
+from collections import defaultdict
+from bisect import bisect_left
+from dataclasses import dataclass, field, replace
 from datetime import datetime
 
-import logging
-
-from typing import Optional, List
+from typing import DefaultDict, Dict, List, Optional, Set, Tuple
 
 from fastapi import APIRouter, HTTPException, status
-from pydantic import BaseModel, ConfigDict, Field
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+
+ISBN_PATTERN = r"^[\d-]+$"
+
+
+def validate_isbn(value: Optional[str]) -> Optional[str]:
+    """
+    Vérifie qu'un ISBN contient au moins un chiffre.
+    Les caractères autorisés sont déjà vérifiés par ISBN_PATTERN.
+
+    Args :
+    value (Optional[str]) : L'ISBN à vérifier
+
+    Returns :
+    Optional[str] : L'ISBN inchangé s'il est valide
+    """
+    if value is not None and not value.strip("-"):
+        raise ValueError("L'ISBN doit contenir au moins un chiffre")
+    return value
+
+
+# (année en cours, timestamp du 1er janvier suivant) : 0.0 force le premier calcul
+_current_year_cache = (0, 0.0)
+
+
+def _current_year() -> int:
+    """
+    Renvoie l'année en cours, recalculée seulement au passage du 1er janvier
+
+    Returns :
+    int : L'année en cours
+    """
+    global _current_year_cache
+
+    year, next_year_at = _current_year_cache
+    now = time.time()
+    if now >= next_year_at:
+        year = time.localtime(now).tm_year
+        _current_year_cache = (year, datetime(year + 1, 1, 1).timestamp())
+    return year
+
+
+def validate_published_year(value: Optional[int]) -> Optional[int]:
+    """
+    Vérifie que l'année de publication n'est pas dans le futur
+
+    Args :
+    value (Optional[int]) : L'année à vérifier
+
+    Returns :
+    Optional[int] : L'année inchangée si elle est valide
+    """
+    if value is not None and value > _current_year():
+        raise ValueError("L'année de publication ne peut pas être dans le futur")
+    return value
 
-logger = logging.getLogger(__name__)
 
 class BookBase(BaseModel):
     """
@@ -28,11 +87,12 @@ class BookBase(BaseModel):
     title: str = Field(..., min_length=1, max_length=200, description="Titre du livre")
     author: str = Field(..., min_length=1, max_length=100, description="Auteur du livre")
     isbn: str = Field(
-        ..., pattern=r"^[\d-]+$", description="ISBN du livre (format: 978-0451524935)"
-    )
-    published_year: int = Field(
-        ..., ge=1000, le=datetime.now().year, description="Année de publication"
+        ..., pattern=ISBN_PATTERN, description="ISBN du livre (format: 978-0451524935)"
     )
+    published_year: int = Field(..., ge=1000, description="Année de publication")
+
+    _check_isbn = field_validator("isbn")(validate_isbn)
+    _check_published_year = field_validator("published_year")(validate_published_year)
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -63,10 +123,23 @@ class BookUpdate(BaseModel):
 
     title: Optional[str] = Field(None, min_length=1, max_length=200)
     author: Optional[str] = Field(None, min_length=1, max_length=100)
-    isbn: Optional[str] = Field(None, pattern=r"^[\d-]+$")
-    published_year: Optional[int] = Field(None, ge=1000, le=datetime.now().year)
+    isbn: Optional[str] = Field(None, pattern=ISBN_PATTERN)
+    published_year: Optional[int] = Field(None, ge=1000)
     available: Optional[bool] = None
 
+    _check_isbn = field_validator("isbn")(validate_isbn)
+    _check_published_year = field_validator("published_year")(validate_published_year)
+
+    @field_validator("*")
+    @classmethod
+    def reject_null(cls, value):
+        """
+        Refuse un champ envoyé explicitement à null : il ne peut pas être effacé
+        """
+        if value is None:
+            raise ValueError("Ce champ ne peut pas être null")
+        return value
+
 
 class Book(BookBase):
     """
@@ -76,9 +149,10 @@ class Book(BookBase):
 
     id: int = Field(..., description="Identifiant unique du livre")
     available: bool = Field(default=True, description="Disponibilité du livre")
-    created_at: datetime = Field(default_factory=datetime.now, description="Date de création")
+    created_at: datetime = Field(..., description="Date de création")
 
     model_config = ConfigDict(
+        from_attributes=True,
         json_schema_extra={
             "example": {
                 "id": 1,
@@ -93,49 +167,198 @@ class Book(BookBase):
     )
 
 
+@dataclass(frozen=True, slots=True)
+class BookRow:
+    """
+    Ligne stockée en mémoire pour un livre, jamais modifiée une fois créée :
+    update_book la remplace par une nouvelle ligne.
+    author_lower est précalculé pour les filtres de get_all_books,
+    serialized contient la réponse JSON du livre, prête à être renvoyée.
+    """
 
-books_db: List[dict] = [
-    {
-        "id": 1,
-        "title": "1984",
-        "author": "George Orwell",
-        "isbn": "978-0451524935",
-        "published_year": 1949,
-        "available": True,
-        "created_at": datetime(2024, 1, 1, 10, 0, 0),
-    },
-    {
-        "id": 2,
-        "title": "Le Petit Prince",
-        "author": "Antoine de Saint-Exupéry",
-        "isbn": "978-2070612758",
-        "published_year": 1943,
-        "available": True,
-        "created_at": datetime(2024, 1, 1, 10, 0, 0),
-    },
-    {
-        "id": 3,
-        "title": "Harry Potter à l'école des sorciers",
-        "author": "J.K. Rowling",
-        "isbn": "978-2070584628",
-        "published_year": 1997,
-        "available": False,
-        "created_at": datetime(2024, 1, 1, 10, 0, 0),
-    },
-    {
-        "id": 4,
-        "title": "Les Misérables",
-        "author": "Victor Hugo",
-        "isbn": "978-2070409228",
-        "published_year": 1862,
-        "available": True,
-        "created_at": datetime(2024, 1, 1, 10, 0, 0),
-    },
+    id: int
+    title: str
+    author: str
+    isbn: str
+    published_year: int
+    available: bool
+    created_at: datetime
+    author_lower: str = field(init=False)
+    serialized: dict = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "author_lower", self.author.lower())
+        object.__setattr__(self, "serialized", Book.model_validate(self).model_dump(mode="json"))
+
+
+books_db: List[BookRow] = [
+    BookRow(
+        id=1,
+        title="1984",
+        author="George Orwell",
+        isbn="978-0451524935",
+        published_year=1949,
+        available=True,
+        created_at=datetime(2024, 1, 1, 10, 0, 0),
+    ),
+    BookRow(
+        id=2,
+        title="Le Petit Prince",
+        author="Antoine de Saint-Exupéry",
+        isbn="978-2070612758",
+        published_year=1943,
+        available=True,
+        created_at=datetime(2024, 1, 1, 10, 0, 0),
+    ),
+    BookRow(
+        id=3,
+        title="Harry Potter à l'école des sorciers",
+        author="J.K. Rowling",
+        isbn="978-2070584628",
+        published_year=1997,
+        available=False,
+        created_at=datetime(2024, 1, 1, 10, 0, 0),
+    ),
+    BookRow(
+        id=4,
+        title="Les Misérables",
+        author="Victor Hugo",
+        isbn="978-2070409228",
+        published_year=1862,
+        available=True,
+        created_at=datetime(2024, 1, 1, 10, 0, 0),
+    ),
 ]
 
-NEXT_ID = 5
+AUTHOR_NGRAM_SIZE = 3
+
+books_by_id: Dict[int, BookRow] = {}
+books_by_isbn: Dict[str, BookRow] = {}
 
-def find_book_by_id(book_id: int) -> Optional[dict]:
+# Index inversés utilisés par les filtres de get_all_books
+ids_by_available: Dict[bool, Set[int]] = {True: set(), False: set()}
+ids_by_author_ngram: DefaultDict[str, Set[int]] = defaultdict(set)
+
+
+books_snapshot: Tuple[BookRow, ...] = ()
+
+# Les écritures sont sérialisées par write_lock. Les handlers ne contiennent aucun
+# await : chaque lecture des index s'exécute donc d'un bloc, sans écriture concurrente.
+# Le verrou et books_snapshot protègent le code futur qui attendrait au milieu d'une
+# écriture ; la liste complète est alors lue depuis books_snapshot, dont les lignes
+# sont figées.
+write_lock = asyncio.Lock()
+
+
+def publish_snapshot() -> None:
+    """
+    Publie une copie figée de books_db pour les lectures qui la parcourent.
+    Appelée après chaque écriture, sous write_lock.
+    """
+    global books_snapshot
+    books_snapshot = tuple(books_db)
+
+
+def author_ngrams(author_lower: str) -> Set[str]:
+    """
+    Découpe un nom d'auteur en trigrammes
+
+    Args :
+    author_lower (str) : Le nom de l'auteur en minuscules
+
+    Returns :
+    Set[str] : Les sous-chaînes de AUTHOR_NGRAM_SIZE caractères du nom
+    """
+    return {
+        author_lower[i : i + AUTHOR_NGRAM_SIZE]
+        for i in range(len(author_lower) - AUTHOR_NGRAM_SIZE + 1)
+    }
+
+
+def index_book(book: BookRow) -> None:
+    """
+    Ajoute un livre aux index de filtrage
+    """
+    ids_by_available[book.available].add(book.id)
+    for ngram in author_ngrams(book.author_lower):
+        ids_by_author_ngram[ngram].add(book.id)
+
+
+def unindex_book(book: BookRow) -> None:
+    """
+    Retire un livre des index de filtrage
+    """
+    ids_by_available[book.available].discard(book.id)
+    for ngram in author_ngrams(book.author_lower):
+        ids_by_author_ngram[ngram].discard(book.id)
+
+
+def rebuild_indexes() -> None:
+    """
+    Reconstruit tous les index à partir de books_db
+    """
+    books_by_id.clear()
+    books_by_isbn.clear()
+    for ids in ids_by_available.values():
+        ids.clear()
+    ids_by_author_ngram.clear()
+
+    for book in books_db:
+        books_by_id[book.id] = book
+        books_by_isbn[book.isbn] = book
+        index_book(book)
+
+    publish_snapshot()
+
+
+rebuild_indexes()
+
+_id_counter = itertools.count(5)
+
+
+def _snapshot() -> tuple:
+    """
+    Capture l'état de la base en mémoire (utilisé par les tests).
+    Les index sont copiés tels quels pour ne pas avoir à les reconstruire.
+
+    Returns :
+    tuple : L'état à passer à _restore
+    """
+    return (
+        books_snapshot,
+        dict(books_by_id),
+        dict(books_by_isbn),
+        {available: set(ids) for available, ids in ids_by_available.items()},
+        {ngram: set(ids) for ngram, ids in ids_by_author_ngram.items()},
+        max(books_by_id, default=0) + 1,
+    )
+
+
+def _restore(snap: tuple) -> None:
+    """
+    Restaure en place un état capturé par _snapshot
+
+    Args :
+    snap (tuple) : L'état renvoyé par _snapshot
+    """
+    global books_snapshot, _id_counter
+
+    rows, by_id, by_isbn, by_available, by_author_ngram, next_id = snap
+
+    books_db[:] = rows
+    books_snapshot = rows
+    books_by_id.clear()
+    books_by_id.update(by_id)
+    books_by_isbn.clear()
+    books_by_isbn.update(by_isbn)
+    ids_by_available.clear()
+    ids_by_available.update(by_available)
+    ids_by_author_ngram.clear()
+    ids_by_author_ngram.update(by_author_ngram)
+    _id_counter = itertools.count(next_id)
+
+
+def find_book_by_id(book_id: int) -> Optional[BookRow]:
 
     """
     Recherche un livre par son ID
@@ -144,15 +367,12 @@ def find_book_by_id(book_id: int) -> Optional[dict]:
     book-id (int) : L'identifiant du livre
 
     Returns :
-    Optionnal[dict] : Livre si trouvé, None sinon
+    Optionnal[BookRow] : Livre si trouvé, None sinon
     """
-    for book in books_db:
-        if book ["id"]==books_db:
-            return book
-    return None
+    return books_by_id.get(book_id)
 
 
-def find_book_by_isbn(book_isbn: str) -> Optional[dict]:
+def find_book_by_isbn(book_isbn: str) -> Optional[BookRow]:
 
     """
     Recherche un livre par son ISBN
@@ -161,14 +381,16 @@ def find_book_by_isbn(book_isbn: str) -> Optional[dict]:
      : L'identifiant du livre
 
     Returns :
-    Optionnal[dict] : Livre si trouvé, None sinon
+    Optionnal[BookRow] : Livre si trouvé, None sinon
     """
-    for book in books_db:
-        if book ["isbn"]==book_isbn:
-            return book
-    return None
-
-@router.get("/", response_model=List[Book], status_code=status.HTTP_200_OK)
+    return books_by_isbn.get(book_isbn)
+
+@router.get(
+    "/",
+    response_model=None,
+    responses={status.HTTP_200_OK: {"model": List[Book]}},
+    status_code=status.HTTP_200_OK,
+)
 async def get_all_books(available: Optional[bool] = None, author: Optional[str] = None):
     """
     Récupère la liste de tous les livres.
@@ -180,22 +402,47 @@ async def get_all_books(available: Optional[bool] = None, author: Optional[str]
     Returns:
         Liste des livres correspondant aux critères
     """
-    result = books_db.copy()
+    logger.info("GET /books/ - Filtres: available=%s, author=%s", available, author)
 
-    logger.info(f"GET /books/ - Filtres: available={available}, author={author}")
+    snapshot = books_snapshot
 
-    if available is not None:
-        result = [book for book in result if book["available"] == available]
-
-    if author:
-        result = [book for book in result if author.lower() in book["author"].lower()]
-
-    logger.info(f"Retour de {len(result)} livres")
-
-    return result
+    if available is None and not author:
+        logger.info("Retour de %d livres", len(snapshot))
+        return ORJSONResponse([book.serialized for book in snapshot])
 
+    author_lc = author.lower() if author else None
 
-@router.get("/{book_id}", response_model=Book, status_code=status.HTTP_200_OK)
+    candidate_ids: Optional[Set[int]] = None
+    if available is not None:
+        candidate_ids = ids_by_available[available]
+    if author_lc and len(author_lc) >= AUTHOR_NGRAM_SIZE:
+        for ngram in author_ngrams(author_lc):
+            ngram_ids = ids_by_author_ngram.get(ngram, set())
+            candidate_ids = ngram_ids if candidate_ids is None else candidate_ids & ngram_ids
+            if not candidate_ids:
+                break
+
+    if candidate_ids is None:
+        result = snapshot
+    else:
+        result = [books_by_id[book_id] for book_id in sorted(candidate_ids)]
+
+    # Les trigrammes ne garantissent pas la contiguïté : on vérifie la sous-chaîne,
+    # sauf si la recherche est elle-même un unique trigramme déjà trouvé dans l'index
+    if author_lc and len(author_lc) != AUTHOR_NGRAM_SIZE:
+        result = [book for book in result if author_lc in book.author_lower]
+
+    logger.info("Retour de %d livres", len(result))
+
+    return ORJSONResponse([book.serialized for book in result])
+
+
+@router.get(
+    "/{book_id}",
+    response_model=None,
+    responses={status.HTTP_200_OK: {"model": Book}},
+    status_code=status.HTTP_200_OK,
+)
 async def get_book(book_id: int):
     """
     Récupère les détails d'un livre spécifique par son ID.
@@ -212,17 +459,22 @@ async def get_book(book_id: int):
     book = find_book_by_id(book_id)
 
     if not book:
-        logger.warning(f"Livre {book_id} non trouvé")
+        logger.warning("Livre %d non trouvé", book_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Le livre avec l'ID {book_id} n'existe pas",
         )
 
-    logger.info(f"Livre {book_id} trouvé: {book['title']}")
-    return book
+    logger.info("Livre %d trouvé: %s", book_id, book.title)
+    return ORJSONResponse(book.serialized)
 
 
-@router.post("/", response_model=Book, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=None,
+    responses={status.HTTP_201_CREATED: {"model": Book}},
+    status_code=status.HTTP_201_CREATED,
+)
 async def create_book(book: BookCreate):
     """
     Crée un nouveau livre dans la bibliothèque.
@@ -236,29 +488,37 @@ async def create_book(book: BookCreate):
     Raises:
         HTTPException 400: Si un livre avec le même ISBN existe déjà
     """
-    global NEXT_ID
+    async with write_lock:
+        existing_book = find_book_by_isbn(book.isbn)
+        if existing_book:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Un livre avec l'ISBN {book.isbn} existe déjà (ID: {existing_book.id})",
+            )
 
-    existing_book = find_book_by_isbn(book.isbn)
-    if existing_book:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Un livre avec l'ISBN {book.isbn} existe déjà (ID: {existing_book['id']})",
+        new_id = next(_id_counter)
+        new_book = BookRow(
+            id=new_id,
+            **book.model_dump(),
+            available=True,
+            created_at=datetime.now(),
         )
 
-    new_book = {
-        "id": NEXT_ID,
-        **book.model_dump(),
-        "available": True,
-        "created_at": datetime.now(),
-    }
-
-    books_db.append(new_book)
-    NEXT_ID += 1
+        books_db.append(new_book)
+        books_by_id[new_id] = new_book
+        books_by_isbn[book.isbn] = new_book
+        index_book(new_book)
+        publish_snapshot()
 
-    return new_book
+    return ORJSONResponse(new_book.serialized, status_code=status.HTTP_201_CREATED)
 
 
-@router.put("/{book_id}", response_model=Book, status_code=status.HTTP_200_OK)
+@router.put(
+    "/{book_id}",
+    response_model=None,
+    responses={status.HTTP_200_OK: {"model": Book}},
+    status_code=status.HTTP_200_OK,
+)
 async def update_book(book_id: int, book_update: BookUpdate):
     """
     Met à jour les informations d'un livre existant.
@@ -275,23 +535,34 @@ async def update_book(book_id: int, book_update: BookUpdate):
         HTTPException 404: Si le livre n'existe pas
         HTTPException 400: Si l'ISBN modifié existe déjà sur un autre livre
     """
-    book = find_book_by_id(book_id)
+    async with write_lock:
+        book = find_book_by_id(book_id)
 
-    if not book:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Le livre avec l'ID {book_id} n'existe pas",
-        )
-
-    update_data = book_update.model_dump(exclude_unset=True)
-    if "isbn" in update_data:
-        existing_book = find_book_by_isbn(update_data["isbn"])
-        if existing_book and existing_book["id"] != book_id:
+        if not book:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Un autre livre utilise déjà l'ISBN {update_data['isbn']}",
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Le livre avec l'ID {book_id} n'existe pas",
             )
 
-    book.update(update_data)
-
-    return book
\ No newline at end of file
+        update_data = book_update.model_dump(exclude_unset=True)
+        if "isbn" in update_data:
+            existing_book = find_book_by_isbn(update_data["isbn"])
+            if existing_book and existing_book.id != book_id:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Un autre livre utilise déjà l'ISBN {update_data['isbn']}",
+                )
+
+        # La nouvelle ligne est construite (et validée) avant de toucher aux index
+        updated_book = replace(book, **update_data)
+
+        if updated_book.isbn != book.isbn:
+            del books_by_isbn[book.isbn]
+        unindex_book(book)
+        books_db[bisect_left(books_db, book_id, key=lambda row: row.id)] = updated_book
+        books_by_id[book_id] = updated_book
+        books_by_isbn[updated_book.isbn] = updated_book
+        index_book(updated_book)
+        publish_snapshot()
+
+    return ORJSONResponse(updated_book.serialized)
\ No newline at end of file
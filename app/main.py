@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
 from app.api.routes.books import router as books_router
 
@@ -9,7 +10,6 @@ setup_logging()
 logger = get_logger(__name__)
 
 logger.info("Démarrage de l'API")
-logger.error("Halala une erreur")
 
 app = FastAPI(
     title="bib",
@@ -27,11 +27,13 @@ async def root():
         "documentation":"/docs"
     }
 
-@app.get("/tests", tags=["Health"])
+@app.get("/tests", tags=["Health"], response_model=None)
 async def health_check():
-    return {
-        "status": "Healthy",
-        "service": "bib-api",
-    }
+    return ORJSONResponse(
+        {
+            "status": "Healthy",
+            "service": "bib-api",
+        }
+    )
 
 app.include_router(books_router, prefix="/books", tags=["Books"])
\ No newline at end of file
@@ -1,8 +1,26 @@
+import functools
 import logging
 import os
 import sys
 
+DEVELOPMENT_FORMATTER = logging.Formatter(
+    fmt="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
+    datefmt="%H:%M:%S",
+)
+
+# Production : format plus simple
+PRODUCTION_FORMATTER = logging.Formatter(
+    fmt="%(asctime)s | %(levelname)s | %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+
+_logging_configured = False
+
 def setup_logging() -> None:
+    global _logging_configured
+
+    if _logging_configured:
+        return
 
     type_env = os.getenv("ENV", "development")
 
@@ -20,23 +38,19 @@ def setup_logging() -> None:
     console_handler.setLevel(level)
 
     if type_env == "development":
-        formatter = logging.Formatter(
-            fmt="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
-            datefmt="%H:%M:%S",  
-        )
+        formatter = DEVELOPMENT_FORMATTER
     else:
-        # Production : format plus simple
-        formatter = logging.Formatter(
-            fmt="%(asctime)s | %(levelname)s | %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
-        )
+        formatter = PRODUCTION_FORMATTER
 
     console_handler.setFormatter(formatter)
     root_logger.addHandler(console_handler)
 
+    _logging_configured = True
+
     logger = logging.getLogger(__name__)
-    logger.info(f"Logging confirmé - Environnement: {type_env}")
+    logger.info("Logging confirmé - Environnement: %s", type_env)
 
+@functools.lru_cache(maxsize=None)
 def get_logger(name: str) -> logging.Logger:
     """
     Get the logger for lags
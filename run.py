@@ -0,0 +1,15 @@
+import os
+
+import uvicorn
+
+if __name__ == "__main__":
+    uvicorn.run(
+        "app.main:app",
+        host=os.getenv("HOST", "127.0.0.1"),
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop",
+        http="httptools",
+        # Les livres sont stockés en mémoire dans chaque processus : au-delà d'un
+        # worker, il faut un stockage partagé, sinon ids et ISBN divergent.
+        workers=int(os.getenv("WORKERS", "1")),
+    )
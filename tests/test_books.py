@@ -1,8 +1,13 @@
+import asyncio
+from datetime import datetime
+
+import httpx
 import pytest
 
 from fastapi.testclient import TestClient
 
-from app.api.routes.books import books_db
+from app.api.routes import books as books_module
+from app.api.routes.books import _current_year, _restore, _snapshot, validate_published_year
 
 from app.main import app
 
@@ -10,13 +15,12 @@ client = TestClient(app)
 
 @pytest.fixture(autouse=True)
 def reset_database():
-    original_db = books_db.copy()
+    snap = _snapshot()
 
     # le test s'exécute ici
     yield
 
-    books_db.clear()
-    books_db.extend(original_db)
+    _restore(snap)
 
 def test_get_all_books():
     """
@@ -54,4 +58,274 @@ def test_get_books_filter_author():
         assert isinstance(book["id"], int)
         assert isinstance(book["isbn"], str)
         assert isinstance(book["title"], str)
-        assert isinstance(book["author"], str)
\ No newline at end of file
+        assert isinstance(book["author"], str)
+
+def test_get_book_by_id():
+    """
+    Test que GET /books/{id} retourne le livre correspondant.
+    """
+    response = client.get("/books/2")
+
+    assert response.status_code == 200
+    book = response.json()
+    assert book["id"] == 2
+    assert book["title"] == "Le Petit Prince"
+
+
+def test_get_book_not_found():
+    """
+    Test que GET /books/{id} retourne 404 si le livre n'existe pas.
+    """
+    response = client.get("/books/999")
+
+    assert response.status_code == 404
+
+
+def test_create_book_then_get_by_id():
+    """
+    Test qu'un livre créé est accessible par son ID.
+    """
+    payload = {
+        "title": "Dune",
+        "author": "Frank Herbert",
+        "isbn": "978-2266320481",
+        "published_year": 1965,
+    }
+    response = client.post("/books/", json=payload)
+
+    assert response.status_code == 201
+    book_id = response.json()["id"]
+    assert book_id == 5
+
+    response = client.get(f"/books/{book_id}")
+    assert response.status_code == 200
+    assert response.json()["title"] == "Dune"
+
+
+def test_create_book_duplicate_isbn():
+    """
+    Test que POST /books/ refuse un ISBN déjà utilisé.
+    """
+    payload = {
+        "title": "Nineteen Eighty-Four",
+        "author": "George Orwell",
+        "isbn": "978-0451524935",
+        "published_year": 1949,
+    }
+    response = client.post("/books/", json=payload)
+
+    assert response.status_code == 400
+
+
+def test_update_book_isbn():
+    """
+    Test que PUT /books/{id} libère l'ancien ISBN et réserve le nouveau.
+    """
+    response = client.put("/books/1", json={"isbn": "978-0000000001"})
+
+    assert response.status_code == 200
+    assert response.json()["isbn"] == "978-0000000001"
+
+    response = client.put("/books/2", json={"isbn": "978-0000000001"})
+    assert response.status_code == 400
+
+    response = client.put("/books/2", json={"isbn": "978-0451524935"})
+    assert response.status_code == 200
+
+
+def test_create_book_invalid_isbn():
+    """
+    Test que POST /books/ refuse un ISBN contenant autre chose que des chiffres et des tirets.
+    """
+    payload = {
+        "title": "Dune",
+        "author": "Frank Herbert",
+        "isbn": "ISBN-978",
+        "published_year": 1965,
+    }
+    response = client.post("/books/", json=payload)
+
+    assert response.status_code == 422
+
+
+def test_update_book_future_year():
+    """
+    Test que PUT /books/{id} refuse une année de publication dans le futur.
+    """
+    response = client.put("/books/1", json={"published_year": 9999})
+
+    assert response.status_code == 422
+
+
+def test_update_book_isbn_without_digits():
+    """
+    Test que PUT /books/{id} refuse un ISBN composé uniquement de tirets.
+    """
+    response = client.put("/books/1", json={"isbn": "---"})
+
+    assert response.status_code == 422
+
+
+def test_get_books_filter_after_update():
+    """
+    Test que les filtres de GET /books/ tiennent compte des mises à jour.
+    """
+    response = client.put("/books/3", json={"author": "Joanne Rowling", "available": True})
+    assert response.status_code == 200
+
+    response = client.get("/books/?author=joanne&available=true")
+
+    assert response.status_code == 200
+    books = response.json()
+    assert [book["id"] for book in books] == [3]
+
+
+def test_health_check():
+    """
+    Test que GET /tests répond que l'API est en bonne santé.
+    """
+    response = client.get("/tests")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "Healthy"
+
+
+def test_get_books_filter_author_substring():
+    """
+    Test que le filtre author reste une recherche partielle, même au milieu d'un mot.
+    """
+    response = client.get("/books/?author=OWLIN")
+    assert [book["id"] for book in response.json()] == [3]
+
+    response = client.get("/books/?author=hu")
+    assert [book["id"] for book in response.json()] == [4]
+
+    response = client.get("/books/?author=Hug")
+    assert [book["id"] for book in response.json()] == [4]
+
+    response = client.get("/books/?author=orwell hugo")
+    assert response.json() == []
+
+
+def test_get_books_filter_available():
+    """
+    Test que GET /books/?available=true exclut les livres indisponibles.
+    """
+    response = client.get("/books/?available=true")
+
+    assert response.status_code == 200
+    assert [book["id"] for book in response.json()] == [1, 2, 4]
+
+
+def test_get_all_books_after_create():
+    """
+    Test que GET /books/ inclut un livre créé juste avant.
+    """
+    payload = {
+        "title": "Dune",
+        "author": "Frank Herbert",
+        "isbn": "978-2266320481",
+        "published_year": 1965,
+    }
+    assert client.post("/books/", json=payload).status_code == 201
+
+    response = client.get("/books/")
+
+    assert response.status_code == 200
+    assert [book["id"] for book in response.json()] == [1, 2, 3, 4, 5]
+
+
+def test_update_book_null_field():
+    """
+    Test que PUT /books/{id} refuse un champ à null sans altérer le livre ni les filtres.
+    """
+    for payload in ({"title": None}, {"available": None}):
+        response = client.put("/books/3", json=payload)
+        assert response.status_code == 422
+
+    assert client.get("/books/3").json()["title"] == "Harry Potter à l'école des sorciers"
+
+    response = client.get("/books/?available=false&author=rowl")
+    assert [book["id"] for book in response.json()] == [3]
+
+
+def test_update_book_null_isbn_keeps_uniqueness():
+    """
+    Test qu'un ISBN à null est refusé et que l'ancien ISBN reste réservé.
+    """
+    response = client.put("/books/3", json={"isbn": None})
+    assert response.status_code == 422
+
+    payload = {
+        "title": "Copie",
+        "author": "Anonyme",
+        "isbn": "978-2070584628",
+        "published_year": 2000,
+    }
+    response = client.post("/books/", json=payload)
+    assert response.status_code == 400
+
+
+def test_update_book_keeps_published_snapshot():
+    """
+    Test qu'une mise à jour publie une nouvelle liste sans modifier l'ancienne.
+    """
+    old_snapshot = books_module.books_snapshot
+
+    response = client.put("/books/1", json={"title": "Nineteen Eighty-Four"})
+    assert response.status_code == 200
+
+    assert old_snapshot[0].title == "1984"
+    assert books_module.books_snapshot is not old_snapshot
+    assert client.get("/books/").json()[0]["title"] == "Nineteen Eighty-Four"
+
+
+def test_create_book_waits_for_write_lock(monkeypatch):
+    """
+    Test qu'une création attend write_lock, pendant que les lectures continuent.
+    """
+    monkeypatch.setattr(books_module, "write_lock", asyncio.Lock())
+    payload = {
+        "title": "Dune",
+        "author": "Frank Herbert",
+        "isbn": "978-2266320481",
+        "published_year": 1965,
+    }
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            async with books_module.write_lock:
+                create = asyncio.create_task(ac.post("/books/", json=payload))
+                for _ in range(10):
+                    await asyncio.sleep(0)
+                assert not create.done()
+
+                listing = await ac.get("/books/")
+                assert len(listing.json()) == 4
+
+            response = await create
+            assert response.status_code == 201
+
+            listing = await ac.get("/books/")
+            assert len(listing.json()) == 5
+
+    asyncio.run(scenario())
+
+
+def test_current_year_rolls_over_on_new_year(monkeypatch):
+    """
+    Test que l'année maximale de publication change dès le 1er janvier.
+    """
+    monkeypatch.setattr(books_module, "_current_year_cache", (0, 0.0))
+    clock = {"now": datetime(2030, 12, 31, 23, 59, 59).timestamp()}
+    monkeypatch.setattr(books_module.time, "time", lambda: clock["now"])
+
+    assert _current_year() == 2030
+    with pytest.raises(ValueError):
+        validate_published_year(2031)
+
+    clock["now"] = datetime(2031, 1, 1, 0, 0, 1).timestamp()
+
+    assert _current_year() == 2031
+    assert validate_published_year(2031) == 2031